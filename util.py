@@ -6,18 +6,36 @@ import os, pathlib, typing, logging
 
 logger = logging.getLogger(__name__)
 
-def rec_listdir(path: str, filter_files: None|typing.Callable[[str], bool] = None) -> list[str]:
+def rec_listdir(path: str, filter_files: None|typing.Callable[[str], bool] = None,
+                extensions: None|tuple[str, ...] = None) -> typing.Iterator[str]:
+    """extensions: lowercase suffixes matched against the entry name before filter_files is called"""
     logger.debug(f"rec_listdir: browsing {path}")
-    result = []
-    for root, _, files in os.walk(path):
-        for filename in files:
-            full_path = os.path.join(root, filename)
-            if filter_files is None or filter_files(full_path):
-                result.append(full_path)
-    return result
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            it = os.scandir(current)
+        except OSError as e:
+            logger.warning(f"rec_listdir: skipping {current}: {e}")
+            continue
+        subdirs = []
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif extensions is not None and not entry.name.lower().endswith(extensions):
+                    continue
+                elif filter_files is None or filter_files(entry.path):
+                    yield entry.path
+        # reversed so the first subdirectory is popped first, the same pre-order os.walk gives
+        stack.extend(reversed(subdirs))
 
-def check_ends(str, ends: typing.Iterable[str], ignore_case: bool = False):
-    for end in ends:
-        if (str.lower() if ignore_case else str).endswith(end):
-            return True
-    return False
+def fit_size(size: tuple[int, int], bounds: tuple[int, int]) -> tuple[int, int]:
+    """largest size with the aspect ratio of size that fits into bounds, never upscales"""
+    w, h = size
+    scale = min(bounds[0] / w, bounds[1] / h, 1.0)
+    return (max(1, round(w * scale)), max(1, round(h * scale)))
+
+def sidecar_path(media_path: str) -> str:
+    """path of the .json tag file next to media_path"""
+    return os.path.splitext(media_path)[0] + '.json'
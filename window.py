@@ -6,14 +6,19 @@ import os
 import pathlib
 import typing
 import logging
-import string
 import tkinter as tk
 import orjson
 from tkinter import filedialog, messagebox
-from PIL import ImageTk, Image
-from threading import Thread
+from PIL import ImageTk, Image, ImageSequence
+from threading import Thread, Lock, get_ident
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import OrderedDict
 from send2trash import send2trash
 import time
+import hashlib
+import functools
+import itertools
+import shutil
 
 import util
 
@@ -29,24 +34,162 @@ except ImportError:
     VLC_SUPPORT = False
     messagebox.showwarning("VLC Missing", "python-vlc library not found. Video playback will be disabled.")
 
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".gif")
+VIDEO_EXTS = (".mp4", ".avi", ".mov", ".mkv")
+ALL_EXTS = IMAGE_EXTS + VIDEO_EXTS
+VIDEO_EXT_SET = frozenset(VIDEO_EXTS)
+NO_PREFETCH_EXT_SET = VIDEO_EXT_SET | {".gif"}
+
+GIF_CACHE_SIZE = 8
+GIF_CACHE_BYTES = 256 * 1024 * 1024
+PHOTO_POOL_BYTES = 64 * 1024 * 1024
+GIF_MAX_FRAMES = 240
+GIF_FRAMES_BYTES = 256 * 1024 * 1024
+GIF_RAW_BYTES = 128 * 1024 * 1024
+GIF_HIDDEN_POLL = 250
+# (path, mtime, target size) -> (frames, frame size), most recently used last, only touched on the Tk thread
+_GIF_CACHE: OrderedDict[tuple, tuple[tuple[ImageTk.PhotoImage, ...], tuple[int, int]]] = OrderedDict()
+
+PHOTO_POOL_CAP = 64
+_PHOTO_POOL: dict[tuple[tuple[int, int], str], list[ImageTk.PhotoImage]] = {}
+
+_photo_pool_bytes = 0
+
+def _photo_nbytes(size: tuple[int, int]) -> int:
+    return size[0] * size[1] * 4
+
+def _photo_pool_key(frame: Image.Image) -> tuple[tuple[int, int], str]:
+    # same mode normalization ImageTk.PhotoImage applies
+    mode = frame.mode if frame.mode in ("1", "L", "RGB", "RGBA") else Image.getmodebase(frame.mode)
+    return frame.size, mode
+
+def _take_photo(frame: Image.Image) -> tuple[ImageTk.PhotoImage, tuple[tuple[int, int], str]]:
+    """photo showing frame, repainted from _PHOTO_POOL when a released one of the same size and mode is free"""
+    global _photo_pool_bytes
+    key = _photo_pool_key(frame)
+    pooled = _PHOTO_POOL.get(key)
+    photo = pooled.pop() if pooled else None
+    if photo is not None:
+        _photo_pool_bytes -= _photo_nbytes(key[0])
+    if photo is None:
+        photo = ImageTk.PhotoImage(frame)
+    else:
+        photo.paste(frame)
+    return photo, key
+
+def _release_photo(photo: ImageTk.PhotoImage, key: tuple[tuple[int, int], str]):
+    """hand a photo nothing displays anymore back to _PHOTO_POOL, within its count and byte budgets"""
+    global _photo_pool_bytes
+    nbytes = _photo_nbytes(key[0])
+    pooled = _PHOTO_POOL.setdefault(key, [])
+    if len(pooled) < PHOTO_POOL_CAP and _photo_pool_bytes + nbytes <= PHOTO_POOL_BYTES:
+        pooled.append(photo)
+        _photo_pool_bytes += nbytes
+
+THUMB_DISK_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "imgtag")
+
+THUMB_DISK_CACHE_BYTES = 256 * 1024 * 1024
+THUMB_DISK_PRUNE_EVERY = 128
+_thumb_saves = itertools.count(1)
+
+def _thumb_disk_dir(path: str) -> str:
+    """directory holding every cached thumbnail of path, whatever size or mtime it was made for"""
+    return os.path.join(THUMB_DISK_CACHE_DIR, hashlib.blake2b(path.encode(), digest_size=16).hexdigest())
+
+def _thumb_disk_path(path: str, cw: int, ch: int) -> None|str:
+    """location of the on-disk thumbnail for path at this canvas size, None if path cannot be stat'ed"""
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    return os.path.join(_thumb_disk_dir(path), f"{mtime_ns}_{cw}x{ch}.webp")
+
+def _save_thumb(img: Image.Image, path: str, cache_path: str):
+    tmp_path = f"{cache_path}.{os.getpid()}.{get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        img.save(tmp_path, "WEBP", quality=90, method=0)
+        os.replace(tmp_path, cache_path)
+        if not os.path.exists(path):
+            # deleted while this was written, _purge_thumbs may already have run
+            os.remove(cache_path)
+    except (OSError, KeyError, ValueError) as e:
+        logger.debug(f"_save_thumb: could not write {cache_path}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    if next(_thumb_saves) % THUMB_DISK_PRUNE_EVERY == 0:
+        _prune_thumbs()
+
+def _purge_thumbs(path: str):
+    shutil.rmtree(_thumb_disk_dir(path), ignore_errors=True)
+
+def _prune_thumbs():
+    """delete least recently used thumbnails until the disk cache fits THUMB_DISK_CACHE_BYTES"""
+    if not os.path.isdir(THUMB_DISK_CACHE_DIR):
+        return
+    entries = []
+    for cache_path in util.rec_listdir(THUMB_DISK_CACHE_DIR):
+        try:
+            st = os.stat(cache_path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, cache_path))
+    total = sum(size for _, size, _ in entries)
+    if total <= THUMB_DISK_CACHE_BYTES:
+        return
+    logger.debug(f"_prune_thumbs: {total} bytes cached, pruning")
+    entries.sort()
+    for _, size, cache_path in entries:
+        if total <= THUMB_DISK_CACHE_BYTES:
+            break
+        try:
+            os.remove(cache_path)
+        except OSError:
+            continue
+        total -= size
+        try:
+            os.rmdir(os.path.dirname(cache_path))
+        except OSError:
+            pass
+
 class GifImageTk:
-    def __init__(self, canvas, x, y, img: Image.Image, resize_thb: None|tuple[int, int] = None):
+    def __init__(self, canvas, x, y, img: Image.Image, resize_thb: None|tuple[int, int] = None,
+                 cache_key: None|tuple = None, raw_frames: None|list[Image.Image] = None):
+        """raw_frames: full size RGBA frames of img, shared with later instances on the same img and filled as frames are decoded"""
         self.canvas = canvas
         self.x = x
         self.y = y
 
         self.image = img
-        self.frames = []
+        self.frames: list[ImageTk.PhotoImage]|tuple[ImageTk.PhotoImage, ...] = []
+        self.frame_keys = []
+        self.raw_frames = raw_frames
+        self.frame_iter = self.source_frames()
         self.current_frame = 0
         self.captured_size = (0, 0)
         self.resize_thb = resize_thb
+        self.cache_key = cache_key
+        self.item_ids: list[int] = []
+        self.stopped = False
+        self.load_failed = False
+        self.cached = False
+        self.next_deadline = 0.0
 
-        for _ in range(3):
-            if not self.continue_load_frame():
-                break
+        cached = None
+        if cache_key is not None:
+            cached = _GIF_CACHE.get(cache_key)
+            if cached is not None:
+                _GIF_CACHE.move_to_end(cache_key)
+        if cached is not None:
+            logger.debug("GifImageTk.__init__: frame cache hit")
+            self.frames, self.captured_size = cached
+            self.cached = True
+            self.eof = True
         else:
-            self.thr = Thread(target=self.continue_load, daemon=True)
-            self.thr.start()
+            self.eof = False
+            self.load_next_frame()
         
         self.delay = int(self.image.info.get("duration", 100))
         
@@ -60,70 +203,140 @@ class GifImageTk:
         if not self.canvas.winfo_exists():
             logger.warning("GifImageTk.start: canvas does not exist")
             return
-        self.image_id = self.canvas.create_image(self.x, self.y, image=self.frames[0], anchor="nw")
+        self.item_ids = [self.canvas.create_image(self.x, self.y, image=self.frames[0], anchor="nw")]
         self.stopped = False
+        self.next_deadline = time.monotonic() + self.delay / 1000
         self.animate()
+    def source_frames(self) -> typing.Iterator[Image.Image]:
+        """full size RGBA frames from frame 0, taken from raw_frames as far as an earlier instance got"""
+        shared = self.raw_frames if self.raw_frames is not None else []
+        yield from shared
+        frames = ImageSequence.Iterator(self.image)
+        frames.position = len(shared)
+        for frame in frames:
+            frame = frame.convert("RGBA")
+            if self.raw_frames is not None and (len(self.raw_frames) + 1) * _photo_nbytes(frame.size) <= GIF_RAW_BYTES:
+                self.raw_frames.append(frame)
+            yield frame
     def continue_load_frame(self) -> bool:
         try:
-            frame = self.image.copy()
+            frame = next(self.frame_iter)
             if self.resize_thb is not None:
-                frame.thumbnail(self.resize_thb, Image.Resampling.LANCZOS)
+                k = max(1, min(frame.width // max(1, self.resize_thb[0]), frame.height // max(1, self.resize_thb[1])))
+                if k > 1:
+                    frame = frame.reduce(k)
+                # resize() rather than thumbnail(), frame may be a shared raw frame that must stay untouched
+                target = util.fit_size(frame.size, self.resize_thb)
+                if target != frame.size:
+                    frame = frame.resize(target, Image.Resampling.BILINEAR)
             self.captured_size = frame.size
-            self.frames.append(ImageTk.PhotoImage(frame))
-            self.image.seek(len(self.frames))
-        except EOFError:
+            photo, key = _take_photo(frame)
+            self.frames.append(photo)
+            self.frame_keys.append(key)
+        except StopIteration:
             return False
         except (OSError, AttributeError, ValueError) as e:
             logger.error(f"GifImageTk.continue_load_frame: error processing frame: {e}")
+            self.load_failed = True
             return False
         else:
             return True
-    def continue_load(self):
-        while self.continue_load_frame():
-            pass
-        logger.debug("GifImageTk.continue_load: finished loading frames")
-    def destroy(self):
-        self.stopped = True
-        if self.image_id and self.canvas.winfo_exists():
+    def load_next_frame(self):
+        if self.eof:
+            return
+        if len(self.frames) >= GIF_MAX_FRAMES or \
+           (len(self.frames) + 1) * _photo_nbytes(self.captured_size) > GIF_FRAMES_BYTES or \
+           not self.continue_load_frame():
+            logger.debug("GifImageTk.load_next_frame: finished loading %s frames", len(self.frames))
+            self.eof = True
+            self.frames = tuple(self.frames)
+            self.store_cache()
+    def store_cache(self):
+        """put fully decoded frames into the module frame cache"""
+        if self.cache_key is None or self.stopped or self.load_failed or not self.frames:
+            return
+        if len(self.frames) * _photo_nbytes(self.captured_size) > GIF_CACHE_BYTES:
+            logger.debug("GifImageTk.store_cache: %s frames exceed the cache budget, not caching", len(self.frames))
+            return
+        self.cached = True
+        _GIF_CACHE[self.cache_key] = (self.frames, self.captured_size)
+        _GIF_CACHE.move_to_end(self.cache_key)
+        while len(_GIF_CACHE) > GIF_CACHE_SIZE or \
+              sum(len(frames) * _photo_nbytes(size) for frames, size in _GIF_CACHE.values()) > GIF_CACHE_BYTES:
+            _GIF_CACHE.popitem(last=False)
+    def delete_items(self):
+        if self.item_ids and self.canvas.winfo_exists():
             try:
-                self.canvas.delete(self.image_id)
+                self.canvas.delete(*self.item_ids)
             except tk.TclError:
                 pass
-        self.image_id = None
+        self.item_ids = []
+    def destroy(self):
+        self.stopped = True
+        self.delete_items()
+        if not self.cached:
+            # frames held by _GIF_CACHE must stay intact, everything else goes back to the pool
+            for photo, key in zip(self.frames, self.frame_keys):
+                _release_photo(photo, key)
         self.frames = []
+        self.frame_keys = []
     def animate(self):
         if self.stopped:
-            if self.image_id and self.canvas.winfo_exists():
-                try:
-                    self.canvas.delete(self.image_id)
-                except tk.TclError: pass
-                self.image_id = None
+            self.delete_items()
             return
 
         if self.frames and self.canvas.winfo_exists():
-            self.current_frame = (self.current_frame + 1) % len(self.frames)
-            try:
-                if self.image_id:
-                    self.canvas.itemconfig(self.image_id, image=self.frames[self.current_frame])
-                else:
-                    logger.warning("GifImageTk.animate: image_id is None, cannot update")
+            if not self.canvas.winfo_viewable():
+                self.next_deadline = time.monotonic() + self.delay / 1000
+                self.canvas.after(GIF_HIDDEN_POLL, self.animate)
+                return
+            now = time.monotonic()
+            if now >= self.next_deadline:
+                if self.current_frame + 1 >= len(self.frames):
+                    self.load_next_frame()
+                prev_frame = self.current_frame
+                self.current_frame = (self.current_frame + 1) % len(self.frames)
+                try:
+                    if not self.item_ids:
+                        logger.warning("GifImageTk.animate: no canvas items, cannot update")
+                        self.stopped = True
+                        return
+                    while len(self.item_ids) <= self.current_frame:
+                        self.item_ids.append(self.canvas.create_image(self.x, self.y, image=self.frames[len(self.item_ids)],
+                                                                      anchor="nw", state="hidden"))
+                    if prev_frame != self.current_frame:
+                        self.canvas.itemconfigure(self.item_ids[self.current_frame], state="normal")
+                        self.canvas.itemconfigure(self.item_ids[prev_frame], state="hidden")
+                except tk.TclError as e:
+                    logger.warning(f"GifImageTk.animate: TclError while updating canvas: {e}, stopping")
                     self.stopped = True
+                    self.delete_items()
                     return
-            except tk.TclError as e:
-                logger.warning(f"GifImageTk.animate: TclError while updating canvas: {e}, stopping")
-                self.stopped = True
-                if self.image_id: self.canvas.delete(self.image_id)
-                self.image_id = None
-                return
-            self.canvas.after(self.delay, self.animate)
-        elif not self.frames and self.image_id and self.canvas.winfo_exists():
-            try:
-                self.canvas.delete(self.image_id)
-            except tk.TclError: pass
-            self.image_id = None
+                self.next_deadline += self.delay / 1000
+                if self.next_deadline < now:
+                    self.next_deadline = now + self.delay / 1000
+            self.canvas.after(max(1, int((self.next_deadline - time.monotonic()) * 1000)), self.animate)
+        elif not self.frames:
+            self.delete_items()
 
 class Window(tk.Tk):
-    VIDEO_EXTENSIONS = [".mp4", ".avi", ".mov", ".mkv"]
+    PREFETCH_CACHE_SIZE = 16
+    THUMB_CACHE_SIZE = 4
+    TAG_COMMIT_DELAY = 200
+    MEDIA_CACHE_SIZE = 8
+    SIDECAR_WORKERS = 16
+    DELETED_COMPACT_THRESHOLD = 1000
+    RESIZE_SETTLE_DELAY = 250
+    RESIZE_PREVIEW_DELAY = 50
+    _KEY_HANDLERS = {
+        'a': 'handle_previous',
+        'd': 'handle_next',
+        'f': 'handle_seek',
+        'j': 'jump_10',
+        'h': 'back_10',
+        ' ': 'handle_pause',
+    }
+    _DIGIT_CHARS = "0123456789*"
     
     def __init__(self):
         logger.debug("Window.__init__")
@@ -133,11 +346,33 @@ class Window(tk.Tk):
         self.image_iter:    int = 0
         self.window_size:   tuple[int, int] = (1, 1)
         self.tag_list:      list[str] = []
+        self._has_score:    bool = False
+        self._last_tags_shown: None|tuple[str, ...] = None
         
         self._raw_image:    None|Image.Image = None
+        self._gif_raw_frames: None|list[Image.Image] = None
         self._image:        None|Image.Image = None
         self._image_cl:     None|ImageTk.PhotoImage|ImageTk.BitmapImage|GifImageTk = None
         self._image_cl_id:  None|int = None
+        self._current_ext:  None|str = None
+        self._sidecar_cache: dict[str, dict] = {}
+        self._dirty_tags:   dict[str, dict] = {}
+        self._commit_after_id: None|str = None
+        self._listing_gen:  int = 0
+        self._pending_afters: set[str] = set()
+        self._afters_lock = Lock()
+        self._deleted_indices: set[int] = set()
+        self._unscored:     set[str] = set()
+        self._has_sidecar:  set[str] = set()
+        self._sidecar_paths: dict[str, str] = {}
+        self._current_gen:  int = 0
+        self._last_thumb_size: tuple[int, int] = (0, 0)
+        self._pool = ThreadPoolExecutor(max_workers=2)
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=1)
+        Thread(target=_prune_thumbs, daemon=True).start()
+        self._prefetch_cache: OrderedDict[tuple[str, int, int], Image.Image] = OrderedDict()
+        self._prefetch_pending: dict[tuple[str, int, int], Future] = {}
+        self._thumb_cache: OrderedDict[tuple[str, int, int], tuple[ImageTk.PhotoImage, tuple[tuple[int, int], str]]] = OrderedDict()
    
         if VLC_SUPPORT:
             try:
@@ -150,6 +385,7 @@ class Window(tk.Tk):
                 self.vlc_player: vlc.MediaPlayer = self.vlc_instance.media_player_new()
                 self.playing_video: bool = False
                 self.volume: int = 50
+                self._media_cache: OrderedDict[str, tuple[vlc.Media, int]] = OrderedDict()
             except BaseException as e:
                 logger.error("Window.__init__: Failed to initialize VLC: %s", e)
                 messagebox.showerror("VLC Initialization Error", f"Could not initialize VLC player. Video playback will be affected.\nError: {e}")
@@ -160,42 +396,90 @@ class Window(tk.Tk):
         
         self.init_widgets()
         self.render_widgets()
+        self._key_map: dict[str, typing.Callable[[], typing.Any]] = {
+            char: getattr(self, name) for char, name in self._KEY_HANDLERS.items()}
+        self._key_map.update((char, functools.partial(self.handle_tag, char)) for char in self._DIGIT_CHARS)
         self.register_hotkeys()
         
         self.update_idletasks()
     
         self.window_size: tuple[int, int] = (self.winfo_width(), self.winfo_height())
         
-        self.resizelast_detect = 0
+        self._resize_after_id: None|str = None
+        self._settle_after_id: None|str = None
+        self._resize_preview: bool = False
+        self._preview_fut:  None|Future = None
         self.protocol("WM_DELETE_WINDOW", self.on_close)
+    @staticmethod
+    def _is_scored(json_path: str) -> None|bool:
+        """sidecar check used while listing, runs off the Tk thread and bypasses _sidecar_cache, None if there is no sidecar"""
+        if not os.path.exists(json_path):
+            return None
+        try:
+            with open(json_path, 'rb', buffering=0) as f:
+                fc = orjson.loads(f.read())
+            tags = fc.get("tags", []) if isinstance(fc, dict) else []
+            return any(isinstance(tag, str) and tag.startswith('score__') for tag in tags)
+        except Exception as e:
+            logger.debug("Window._is_scored: Error reading JSON %s: %s", json_path, e)
+            return False
+    def _json_path(self, image_path: str) -> str:
+        json_path = self._sidecar_paths.get(image_path)
+        return json_path if json_path is not None else util.sidecar_path(image_path)
     def load_tags(self, image_path: str) -> list[str]:
-        json_path = os.path.splitext(image_path)[0] + '.json'
+        if image_path not in self._has_sidecar:
+            return []
+        json_path = self._json_path(image_path)
         if os.path.exists(json_path):
             try:
-                with open(json_path, 'r', encoding='utf-8') as f:
+                with open(json_path, 'rb', buffering=0) as f:
                     fc = orjson.loads(f.read())
-                return fc.get("tags", [])
             except Exception as e:
                 logger.error("Window.load_tags: Error reading JSON %s: %s", json_path, e)
                 return []
+            if not isinstance(fc, dict):
+                logger.error("Window.load_tags: %s does not hold a JSON object", json_path)
+                return []
+            tags = fc.get("tags")
+            self._sidecar_cache[image_path] = fc
+            return [tag for tag in tags if isinstance(tag, str)] if isinstance(tags, list) else []
         else:
+            self._sidecar_cache[image_path] = {}
             return []
     def save_tags(self, image_path: str, tag_list: typing.Iterable[str]):
-        json_path = os.path.splitext(image_path)[0] + '.json'
-        fc = {}
-        if os.path.exists(json_path):
+        json_path = self._json_path(image_path)
+        fc = self._sidecar_cache.get(image_path)
+        if fc is None:
+            fc = {}
+            if os.path.exists(json_path):
+                try:
+                    with open(json_path, 'rb', buffering=0) as f:
+                        fc = orjson.loads(f.read())
+                except Exception as e:
+                    logger.warning("Window.save_tags: Could not parse existing JSON %s: %s", json_path, e)
+                    fc = {}
+                if not isinstance(fc, dict):
+                    logger.warning("Window.save_tags: %s does not hold a JSON object, replacing it", json_path)
+                    fc = {}
+        fc["tags"] = list(tag_list)
+        self._sidecar_cache[image_path] = fc
+        self._dirty_tags[image_path] = fc
+        if self._commit_after_id is None:
+            self._commit_after_id = self._after(self.TAG_COMMIT_DELAY, self._commit_tags)
+    def _commit_tags(self):
+        """write out sidecars changed by save_tags, so a burst of score keys costs one write"""
+        if self._commit_after_id is not None:
+            self._after_cancel(self._commit_after_id)
+            self._commit_after_id = None
+        dirty, self._dirty_tags = self._dirty_tags, {}
+        for image_path, fc in dirty.items():
+            json_path = self._json_path(image_path)
             try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    fc = orjson.loads(f.read())
+                with open(json_path, 'wb') as f:
+                    f.write(orjson.dumps(fc, option=orjson.OPT_APPEND_NEWLINE))
+                self._has_sidecar.add(image_path)
             except Exception as e:
-                logger.warning("Window.save_tags: Could not parse existing JSON %s: %s", json_path, e)
-                fc = {}
-        fc["tags"] = list(tag_list)
-        try:
-            with open(json_path, 'wb') as f:
-                f.write(orjson.dumps(fc))
-        except Exception as e:
-            logger.error("Window.save_tags: Error writing JSON %s: %s", json_path, e)
+                logger.error("Window._commit_tags: Error writing JSON %s: %s", json_path, e)
     def load_file(self):
         logger.debug("Window.load_file: asking filepicker")
         picked_dir_raw = filedialog.askdirectory(mustexist=True)
@@ -207,22 +491,72 @@ class Window(tk.Tk):
                 messagebox.showerror("Error", "Failed to resolve path %s: %s" % (picked_dir_raw, e))
                 return
             logger.debug("Window.load_file: picked %s", picked_dir)
-            files = util.rec_listdir(picked_dir,
-                            lambda path: util.check_ends(path, [".png", ".jpg", ".jpeg", ".bmp", ".gif"]
-                                                         + (self.VIDEO_EXTENSIONS if VLC_SUPPORT else []), ignore_case=True))
-            if not files:
-                messagebox.showinfo("No files found", "No supported images found in selected directory")
-            self.image_list = files
+            self._listing_gen += 1
+            self._clean_mediasource()
+            self.image_list = []
             self.image_iter = 0
-            self.reload_image()
+            self._deleted_indices.clear()
+            self._unscored.clear()
+            self._has_sidecar.clear()
+            self._sidecar_paths.clear()
+            self._prefetch_cache.clear()
+            self._thumb_cache.clear()
+            self.fileNameLabel.configure(text="No file loaded")
+            self.reload_tags()
+            extensions = ALL_EXTS if VLC_SUPPORT else IMAGE_EXTS
+            Thread(target=self._populate_image_list, args=(picked_dir, extensions, self._listing_gen), daemon=True).start()
         else:
             logger.debug("Window.load_file: canceled")
+    def _populate_image_list(self, picked_dir: str, extensions: tuple[str, ...], listing_gen: int):
+        """runs on a worker thread, hands found files to the Tk thread in batches"""
+        BATCH_SIZE = 100
+        batch: list[str] = []
+        with ThreadPoolExecutor(max_workers=self.SIDECAR_WORKERS) as sidecar_pool:
+            def post(done: bool = False):
+                json_paths = [util.sidecar_path(path) for path in batch]
+                scored = list(sidecar_pool.map(self._is_scored, json_paths))
+                unscored = [path for path, is_scored in zip(batch, scored) if not is_scored]
+                has_sidecar = [path for path, is_scored in zip(batch, scored) if is_scored is not None]
+                self._after(0, self._append_images, batch, dict(zip(batch, json_paths)), unscored, has_sidecar, listing_gen, done)
+            first = True
+            try:
+                for path in util.rec_listdir(picked_dir, extensions=extensions):
+                    if listing_gen != self._listing_gen:
+                        logger.debug("Window._populate_image_list: listing of %s superseded, stopping", picked_dir)
+                        return
+                    batch.append(path)
+                    if first or len(batch) >= BATCH_SIZE:
+                        post()
+                        batch = []
+                        first = False
+            finally:
+                if listing_gen == self._listing_gen:
+                    post(True)
+    def _append_images(self, batch: list[str], json_paths: dict[str, str], unscored: list[str], has_sidecar: list[str],
+                       listing_gen: int, done: bool = False):
+        if listing_gen != self._listing_gen:
+            return
+        was_empty = not self.image_list
+        self.image_list.extend(batch)
+        self._sidecar_paths.update(json_paths)
+        self._unscored.update(unscored)
+        self._has_sidecar.update(has_sidecar)
+        if was_empty and self.image_list:
+            self.reload_image()
+        if done:
+            logger.debug("Window._append_images: listing finished, %s files", len(self.image_list))
+            if not self.image_list:
+                messagebox.showinfo("No files found", "No supported images found in selected directory")
     def handle_tag(self, digit):
         logger.debug("Window.handle_tag: %s", digit)
-        if any(tag.startswith('score__') for tag in self.tag_list):
+        if not self.image_list:
+            return
+        if self._has_score:
             self.tag_list = [tag for tag in self.tag_list if not tag.startswith('score__')]
         self.tag_list.append('score__%s' % ("10" if digit == '*' else digit))
+        self._has_score = True
         self.save_tags(self.image_list[self.image_iter], self.tag_list)
+        self._unscored.discard(self.image_list[self.image_iter])
         self.flush_tags()
     def reload_image(self):
         if not self.image_list:
@@ -234,26 +568,17 @@ class Window(tk.Tk):
         if not os.path.exists(self.image_list[self.image_iter]):
             logger.error("Window.reload_image: failed to load media %s: %s", self.image_list[self.image_iter], f"Media {self.image_list[self.image_iter]} does not exist")
             messagebox.showerror("Error", "Failed to load media %s: %s" % (self.image_list[self.image_iter], f"Media {self.image_list[self.image_iter]} does not exist"))
-            self.image_list.pop(self.image_iter)
-            self.image_iter = 0
-            self.reload_image()
+            self._drop_current()
             return
-        pc = (self.image_iter+1) / len(self.image_list) * 100
+        pos, total = self._position()
+        pc = pos / total * 100
         self.reload_tags()
-        if VLC_SUPPORT and os.path.splitext(self.image_list[self.image_iter])[1].lower() in self.VIDEO_EXTENSIONS:
+        self._current_ext = os.path.splitext(self.image_list[self.image_iter])[1].lower()
+        if VLC_SUPPORT and self._current_ext in VIDEO_EXT_SET:
             logger.debug("Window.reload_image: loading video %s", self.image_list[self.image_iter])
             try:
-                media: vlc.Media = self.vlc_instance.media_new(self.image_list[self.image_iter])
-                if not media:
-                    raise RuntimeError("Failed to load video %s" % self.image_list[self.image_iter])
-                
-                media.parse()
-                length = media.get_duration()
-                
-                media.add_option('input-repeat=65535')
-                media.add_option(':no-video-title-show')
+                media, length = self._get_media(self.image_list[self.image_iter])
                 self.vlc_player.set_media(media)
-                media.release()
                 self.image.update_idletasks()
                 win_id = self.image.winfo_id()
                 if platform.system() in ["Windows", "Darwin"]:
@@ -271,30 +596,54 @@ class Window(tk.Tk):
                     timespf = f"{(length/1000):.1f} sec."
                 
                 self.curr_timespf = timespf
+                self._label_suffix = f"\t{pc:.2f}% {pos}/{total}\t{self.image_list[self.image_iter]}\t{timespf}"
                 
-                self.fileNameLabel.configure(text=f"V={self.volume}%\t{pc:.2f}% {self.image_iter+1}/{len(self.image_list)}\t" + self.image_list[self.image_iter] +
-                                             f"\t{timespf}")
+                self.fileNameLabel.configure(text=f"V={self.volume}%{self._label_suffix}")
             except BaseException as e:
                 logger.error("Window.reload_image: failed to load video %s: %s", self.image_list[self.image_iter], e)
                 messagebox.showerror("Error", f"Failed to load video {self.image_list[self.image_iter]}: {e}")
-                self.image_list.pop(self.image_iter)
-                self.image_iter = 0
-                self.reload_image()
+                self._drop_current()
                 return
         else:
             try:
-                self._raw_image = Image.open(self.image_list[self.image_iter])
+                if self._current_ext == ".gif":
+                    self._raw_image = Image.open(self.image_list[self.image_iter])
+                    self._gif_raw_frames = []
             except BaseException as e:
                 logger.error("Window.reload_image: failed to load image %s: %s", self.image_list[self.image_iter], e)
                 messagebox.showerror("Error", "Failed to load image %s: %s" % (self.image_list[self.image_iter], e))
-                self.image_list.pop(self.image_iter)
-                self.image_iter = 0
-                self.reload_image()
+                self._drop_current()
                 return
             self.playing_video = False
-            self.fileNameLabel.configure(text=f"{pc:.2f}% {self.image_iter+1}/{len(self.image_list)}\t" + self.image_list[self.image_iter])
+            self.fileNameLabel.configure(text=f"{pc:.2f}% {pos}/{total}\t" + self.image_list[self.image_iter])
             self.flush_image()
-    def flush_image(self, _recprotect = True):
+        self._prefetch_neighbours()
+    def _get_media(self, path: str) -> tuple["vlc.Media", int]:
+        """parsed media and its duration in ms, the last few are kept so revisiting a video skips parse()"""
+        cached = self._media_cache.get(path)
+        if cached is not None:
+            self._media_cache.move_to_end(path)
+            return cached
+        media: vlc.Media = self.vlc_instance.media_new(path)
+        if not media:
+            raise RuntimeError("Failed to load video %s" % path)
+        
+        media.parse()
+        length = media.get_duration()
+        
+        media.add_option('input-repeat=65535')
+        media.add_option(':no-video-title-show')
+        self._media_cache[path] = (media, length)
+        while len(self._media_cache) > self.MEDIA_CACHE_SIZE:
+            _, (evicted, _) = self._media_cache.popitem(last=False)
+            evicted.release()
+        return media, length
+    def _forget_media(self, path: str):
+        cached = self._media_cache.pop(path, None)
+        if cached is not None:
+            cached[0].release()
+    def flush_image(self, _recprotect = True, fast: bool = False):
+        """fast: bilinear render for an ongoing resize, kept out of the caches"""
         
         if VLC_SUPPORT and self.playing_video:
             if hasattr(self, '_image_cl_id') and self._image_cl_id is not None:
@@ -303,94 +652,270 @@ class Window(tk.Tk):
                 self._image_cl_id = None
             return
         
-        if self.image_list and self._raw_image is not None:
+        if self.image_list and self._current_ext is not None and (self._raw_image is not None or self._current_ext != ".gif"):
             logger.debug("Window.flush_image: flushing canvas")
             cw = self.image.winfo_width()
             ch = self.image.winfo_height()
             if (cw < 10 or ch < 10) and _recprotect:
-                self.after(10, self.flush_image, False)
+                self._after(10, self.flush_image, False, fast)
                 return
-            try:
-                self._image = self._raw_image.copy()
-            except OSError:
-                self.reload_image()
+            lw, lh = self._last_thumb_size
+            if abs(cw - lw) < 4 and abs(ch - lh) < 4 and self._image_cl is not None:
+                logger.debug("Window.flush_image: canvas size unchanged, skipping")
                 return
-            self._image.thumbnail((cw, ch), Image.Resampling.LANCZOS)
             x_center = cw / 2
             y_center = ch / 2
+            path = self.image_list[self.image_iter]
+            self._current_gen += 1
+            self._resize_preview = False
             try:
-                if self.image_list[self.image_iter].lower().endswith(".gif"):
-                    self._image_cl = GifImageTk(self.image, x_center, y_center, self._raw_image, resize_thb=(cw, ch))
+                if self._current_ext == ".gif":
+                    if isinstance(self._image_cl, GifImageTk):
+                        self._image_cl.destroy()
+                    self._image_cl = GifImageTk(self.image, x_center, y_center, self._raw_image, resize_thb=(cw, ch),
+                                                cache_key=(path, os.path.getmtime(path), (cw, ch)), raw_frames=self._gif_raw_frames)
                     self._image_cl.start()
                     self._image_cl_id = None
+                    self._last_thumb_size = (cw, ch)
+                elif (thumb := self._thumb_cache.get((path, cw, ch))) is not None:
+                    logger.debug("Window.flush_image: thumbnail cache hit")
+                    self._thumb_cache.move_to_end((path, cw, ch))
+                    self._image = None
+                    self._place_still(thumb[0], (cw, ch))
+                elif (cached := self._prefetch_cache.get((path, cw, ch))) is not None:
+                    logger.debug("Window.flush_image: prefetch cache hit")
+                    self._prefetch_cache.move_to_end((path, cw, ch))
+                    self._show_still(cached, (cw, ch), path)
                 else:
-                    self._image = self._raw_image.copy()
-                    self._image.thumbnail((cw, ch), Image.Resampling.LANCZOS)
-                    
-                    self._image_cl = ImageTk.PhotoImage(self._image)
-                    if self._image_cl_id is not None:
-                        self.image.delete(self._image_cl_id)
-                    self._image_cl_id = self.image.create_image(x_center, y_center, image=self._image_cl)
+                    gen = self._current_gen
+                    fut = self._prefetch_pending.pop((path, cw, ch), None)
+                    if fut is not None and fut.cancel():
+                        fut = None
+                    if fut is not None:
+                        logger.debug("Window.flush_image: waiting for running prefetch")
+                        fast = False
+                    else:
+                        self._resize_preview = fast
+                        fut = self._pool.submit(self._decode_resized, path, cw, ch, fast)
+                        if fast:
+                            self._preview_fut = fut
+                    fut.add_done_callback(lambda f: self._after(0, self._install_photoimage, f, gen, path, (cw, ch), fast))
             except Exception as e:
                 logger.error("Window.flush_image: error during image processing/display for %s: %s", self.image_list[self.image_iter], e, exc_info=True)
                 messagebox.showerror("Image display error", f"Could not display image: {self.image_list[self.image_iter]}\n{e}")
-                self.after(10, self.reload_image)
+                self._after(10, self.reload_image)
+    @staticmethod
+    def _decode_resized(path: str, cw: int, ch: int, fast: bool = False) -> Image.Image:
+        """runs on the worker pool: open, draft and decode happen here, Pillow releases the GIL while decoding and resampling
+        fast: coarsest draft and bilinear only, the result is not written to the disk cache"""
+        cache_path = _thumb_disk_path(path, cw, ch)
+        if cache_path is not None and os.path.exists(cache_path):
+            try:
+                with Image.open(cache_path) as cached:
+                    cached.load()
+            except OSError as e:
+                logger.debug("Window._decode_resized: unreadable cached thumbnail %s: %s", cache_path, e)
+            else:
+                try:
+                    os.utime(cache_path)
+                except OSError:
+                    pass
+                return cached
+        with Image.open(path) as img:
+            drafted = False
+            if img.format == "JPEG":
+                headroom = 1 if fast else 2
+                drafted = img.draft("RGB", (cw * headroom, ch * headroom)) is not None
+            target = util.fit_size(img.size, (cw, ch))
+            if target == img.size:
+                img.load()
+                return img
+            if not fast and (drafted or (img.width <= target[0] * 2 and img.height <= target[1] * 2)):
+                resample = Image.Resampling.LANCZOS
+            else:
+                resample = Image.Resampling.BILINEAR
+            result = img.resize(target, resample, reducing_gap=2.0)
+        if not fast and cache_path is not None and result.mode in ("RGB", "RGBA"):
+            Thread(target=_save_thumb, args=(result, path, cache_path), daemon=True).start()
+        return result
+    def _install_photoimage(self, fut: Future, gen: int, path: str, size: tuple[int, int], fast: bool = False):
+        if gen != self._current_gen or fut.cancelled():
+            logger.debug("Window._install_photoimage: dropping stale render of %s", path)
+            return
+        try:
+            img = fut.result()
+        except BaseException as e:
+            logger.error("Window._install_photoimage: failed to load image %s: %s", path, e)
+            messagebox.showerror("Error", "Failed to load image %s: %s" % (path, e))
+            if self.image_list and self.image_list[self.image_iter] == path:
+                self._drop_current()
+            return
+        try:
+            if fast:
+                self._image = img
+                self._place_still(ImageTk.PhotoImage(img), size)
+            else:
+                self._show_still(img, size, path)
+        except Exception as e:
+            logger.error("Window._install_photoimage: error during image processing/display for %s: %s", path, e, exc_info=True)
+            messagebox.showerror("Image display error", f"Could not display image: {path}\n{e}")
+        else:
+            if not fast:
+                self._cache_resized((path, *size), img)
+    def _show_still(self, img: Image.Image, size: tuple[int, int], path: str):
+        self._image = img
+        key = (path, *size)
+        while len(self._thumb_cache) >= self.THUMB_CACHE_SIZE:
+            _, (old_photo, old_key) = self._thumb_cache.popitem(last=False)
+            if old_photo is not self._image_cl:
+                _release_photo(old_photo, old_key)
+        photo, pool_key = _take_photo(img)
+        self._thumb_cache[key] = (photo, pool_key)
+        self._thumb_cache.move_to_end(key)
+        self._place_still(photo, size)
+    def _place_still(self, photo: ImageTk.PhotoImage, size: tuple[int, int]):
+        self._image_cl = photo
+        if self._image_cl_id is not None:
+            self.image.delete(self._image_cl_id)
+        self._image_cl_id = self.image.create_image(size[0] / 2, size[1] / 2, image=self._image_cl)
+        self._last_thumb_size = size
+    def _cache_resized(self, key: tuple[str, int, int], img: Image.Image):
+        self._prefetch_cache[key] = img
+        self._prefetch_cache.move_to_end(key)
+        while len(self._prefetch_cache) > self.PREFETCH_CACHE_SIZE:
+            self._prefetch_cache.popitem(last=False)
+    def _prefetch_neighbours(self):
+        """decode the next and previous still images at the current canvas size in background"""
+        cw = self.image.winfo_width()
+        ch = self.image.winfo_height()
+        if cw < 10 or ch < 10 or len(self.image_list) < 2:
+            return
+        wanted = []
+        for step in (1, -1):
+            i = self._live_neighbour(step)
+            if i is None or i == self.image_iter:
+                continue
+            path = self.image_list[i]
+            if os.path.splitext(path)[1].lower() in NO_PREFETCH_EXT_SET:
+                continue
+            wanted.append((path, cw, ch))
+        for key, fut in list(self._prefetch_pending.items()):
+            if key not in wanted and fut.cancel():
+                logger.debug("Window._prefetch_neighbours: cancelled prefetch of %s", key[0])
+        for key in wanted:
+            if key in self._prefetch_cache or key in self._prefetch_pending:
+                continue
+            logger.debug("Window._prefetch_neighbours: prefetching %s", key[0])
+            fut = self._prefetch_pool.submit(self._decode_resized, *key)
+            self._prefetch_pending[key] = fut
+            fut.add_done_callback(lambda f, key=key: self._after(0, self._store_prefetch, key, f))
+    def _store_prefetch(self, key: tuple[str, int, int], fut: Future):
+        if self._prefetch_pending.get(key) is fut:
+            del self._prefetch_pending[key]
+        if fut.cancelled():
+            return
+        if (e := fut.exception()) is not None:
+            logger.debug("Window._store_prefetch: failed to prefetch %s: %s", key[0], e)
+            return
+        self._cache_resized(key, fut.result())
     def reload_tags(self, flush: bool = True):
+        self._commit_tags()
+        self._sidecar_cache.clear()
         if self.image_list:
             logger.debug("Window.reload_tags: reloading tags for image %s", self.image_list[self.image_iter])
             self.tag_list = self.load_tags(self.image_list[self.image_iter])
+            self._has_score = any(tag.startswith('score__') for tag in self.tag_list)
         else:
             self.tag_list = []
+            self._has_score = False
         if flush:
             self.flush_tags()
     def flush_tags(self):
         logger.debug("Window.flush_tags")
+        shown = tuple(self.tag_list)
+        if shown == self._last_tags_shown:
+            return
         tags_fs = ('"' + '", "'.join(self.tag_list) + '"') if self.tag_list else 'None'
         CUT_LENGTH = 360
         if len(tags_fs) > CUT_LENGTH: 
-            tags_fs = tags_fs[:CUT_LENGTH//2] + "<...>" + tags_fs[-CUT_LENGTH//2:]
+            tags_fs = f"{tags_fs[:CUT_LENGTH//2]}<...>{tags_fs[-CUT_LENGTH//2:]}"
         if hasattr(self, 'tagList') and self.tagList.winfo_exists():
             self.tagList.configure(text=f'Tags: {tags_fs}')
+            self._last_tags_shown = shown
         else:
             logger.warning("Window.flush_tags: tagList widget does not exist.")
+    def _live_neighbour(self, step: int) -> None|int:
+        """index of the nearest not deleted entry in direction step, wrapping around"""
+        n = len(self.image_list)
+        i = self.image_iter
+        for _ in range(n):
+            i = (i + step) % n
+            if i not in self._deleted_indices:
+                return i
+        return None
+    def _position(self) -> tuple[int, int]:
+        """1-based position of the current entry and the number of entries, deleted ones excluded"""
+        skipped = sum(1 for i in self._deleted_indices if i < self.image_iter)
+        return self.image_iter + 1 - skipped, len(self.image_list) - len(self._deleted_indices)
+    def _compact_image_list(self):
+        if not self._deleted_indices:
+            return
+        logger.debug("Window._compact_image_list: dropping %s deleted entries", len(self._deleted_indices))
+        skipped = sum(1 for i in self._deleted_indices if i < self.image_iter)
+        self.image_list = [p for i, p in enumerate(self.image_list) if i not in self._deleted_indices]
+        self.image_iter = max(0, self.image_iter - skipped) if self.image_list else 0
+        self._deleted_indices.clear()
+    def _drop_current(self):
+        """forget the current entry after it failed to load and start over from the first one"""
+        self._compact_image_list()
+        self.image_list.pop(self.image_iter)
+        self.image_iter = 0
+        self.reload_image()
     def handle_next(self, *a, **kw):
         if self.image_list:
             logger.debug("Window.handle_next: switching to next image")
-            self.image_iter = (self.image_iter + 1) % len(self.image_list)
+            self.image_iter = self._live_neighbour(1) or 0
             self.reload_image()
     def handle_previous(self, *a, **kw):
         if self.image_list:
             logger.debug("Window.handle_previous: switching to previous image")
-            self.image_iter = (self.image_iter - 1 + len(self.image_list)) % len(self.image_list)
+            self.image_iter = self._live_neighbour(-1) or 0
             self.reload_image()
     def keypress_callback(self, event: tk.Event):
-        if event.char == 'a':
-            self.handle_previous()
-        elif event.char == 'd':
-            self.handle_next()
-        elif event.char == 'f':
-            self.handle_seek()
-        elif event.char == 'j':
-            self.jump_10()
-        elif event.char == 'h':
-            self.back_10()
-        elif event.char == ' ':
-            self.handle_pause()
-        elif event.char and (event.char in string.digits or event.char == '*'):
-            self.handle_tag(event.char)
-    def resizelast_detect_f(self, f_detect_i: int):
-        if f_detect_i == self.resizelast_detect:
-            logger.debug("Window.resizelast_detect_f: detected window resize")
-            self.resizelast_detect = 0
-            if VLC_SUPPORT and not self.playing_video:
-                self.flush_image()
+        handler = self._key_map.get(event.char)
+        if handler is not None:
+            handler()
+    def _do_flush_on_resize(self):
+        logger.debug("Window._do_flush_on_resize: detected window resize")
+        self._resize_after_id = None
+        if self._preview_fut is not None and not self._preview_fut.done():
+            self._resize_after_id = self._after(self.RESIZE_PREVIEW_DELAY, self._do_flush_on_resize)
+            return
+        self.flush_image(fast=True)
+    def _settle_resize(self):
+        self._settle_after_id = None
+        if self._resize_after_id is not None:
+            self._after_cancel(self._resize_after_id)
+            self._resize_after_id = None
+        if self._resize_preview:
+            logger.debug("Window._settle_resize: redrawing resize preview at full quality")
+            # same canvas size as the preview, flush_image would otherwise skip it
+            self._last_thumb_size = (0, 0)
+        self.flush_image()
+        self._prefetch_neighbours()
     def handle_resize(self, event):
         ww = self.winfo_width()
         wh = self.winfo_height()
         if (ww, wh) != self.window_size:
             self.window_size = (ww, wh)
-            self.resizelast_detect += 1
-            self.after(125, self.resizelast_detect_f, self.resizelast_detect)
+            if self._resize_after_id is None:
+                self._resize_after_id = self._after(self.RESIZE_PREVIEW_DELAY, self._do_flush_on_resize)
+            if self._settle_after_id is not None:
+                self._after_cancel(self._settle_after_id)
+            self._settle_after_id = self._after(self.RESIZE_SETTLE_DELAY, self._settle_resize)
+    def _on_configure(self, event):
+        self.handle_resize(event)
+        self.update_taglist_wraplength(event)
     def handle_delete(self, *args, **kwargs):
         if not self.image_list:
             messagebox.showinfo("Delete", "No image to delete.")
@@ -401,11 +926,29 @@ class Window(tk.Tk):
         logger.debug("Window.handle_delete: deleting image %s", self.image_list[self.image_iter])
         try:
             self._clean_mediasource()
+            self._dirty_tags.pop(self.image_list[self.image_iter], None)
+            if VLC_SUPPORT:
+                self._forget_media(self.image_list[self.image_iter])
             send2trash(self.image_list[self.image_iter])
-            if os.path.exists('.'.join(self.image_list[self.image_iter].split('.')[:-1])+'.json'):
-                send2trash('.'.join(self.image_list[self.image_iter].split('.')[:-1])+'.json')
-            self.image_list.pop(self.image_iter)
-            self.image_iter %= len(self.image_list)
+            json_path = self._json_path(self.image_list[self.image_iter])
+            if os.path.exists(json_path):
+                send2trash(json_path)
+            _purge_thumbs(self.image_list[self.image_iter])
+            self._has_sidecar.discard(self.image_list[self.image_iter])
+            self._sidecar_paths.pop(self.image_list[self.image_iter], None)
+            for cache in (self._thumb_cache, self._prefetch_cache):
+                for key in [key for key in cache if key[0] == self.image_list[self.image_iter]]:
+                    del cache[key]
+            self._deleted_indices.add(self.image_iter)
+            nxt = self._live_neighbour(1)
+            if nxt is None:
+                self._compact_image_list()
+                self.fileNameLabel.configure(text="No file loaded")
+                self.reload_tags()
+                return
+            self.image_iter = nxt
+            if len(self._deleted_indices) > self.DELETED_COMPACT_THRESHOLD:
+                self._compact_image_list()
             self.reload_image()
         except BaseException as e:
             logger.error("Window.handle_delete: %s", e)
@@ -446,16 +989,40 @@ class Window(tk.Tk):
         self.bind("<Key-Right>", self.handle_next)
         self.bind("<Key-Down>", self.volume_down)
         self.bind("<Key-Up>", self.volume_up)
-        self.bind("<Configure>", self.handle_resize)
-        self.bind("<Configure>", self.update_taglist_wraplength)
+        self.bind("<Configure>", self._on_configure)
         self.bind("<Delete>", self.handle_delete)
         self.bind("<Escape>", lambda e: self.on_close())
+    def _after(self, ms: int, func: typing.Callable, *args) -> str:
+        """self.after that remembers the id until the callback ran, so on_close can cancel what is left"""
+        after_id = None
+        ran = False
+        def run():
+            nonlocal ran
+            with self._afters_lock:
+                ran = True
+                if after_id is not None:
+                    self._pending_afters.discard(after_id)
+            func(*args)
+        # not under the lock: from a worker thread after() waits for the Tk thread, which may be waiting in run()
+        after_id = self.after(ms, run)
+        with self._afters_lock:
+            if not ran:
+                self._pending_afters.add(after_id)
+        return after_id
+    def _after_cancel(self, after_id: str):
+        self._pending_afters.discard(after_id)
+        self.after_cancel(after_id)
     def on_close(self):
         logger.debug("Window.on_close")
         
+        self._commit_tags()
         self._clean_mediasource()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._prefetch_pool.shutdown(wait=False, cancel_futures=True)
         
         if VLC_SUPPORT:
+            for path in list(self._media_cache):
+                self._forget_media(path)
             if self.vlc_player:
                 self.vlc_player.release()
                 del self.vlc_player
@@ -463,12 +1030,15 @@ class Window(tk.Tk):
                 self.vlc_instance.release()
                 del self.vlc_instance
         
-        for after_id in self.tk.eval('after info').split():
+        with self._afters_lock:
+            pending = list(self._pending_afters)
+        for after_id in pending:
             self.after_cancel(after_id)
         #self.destroy()
         exit(0)
     def _clean_mediasource(self):
         logger.debug("Window._clean_mediasource")
+        self._current_gen += 1
         if VLC_SUPPORT:
             if self.playing_video:
                 self.playing_video = False
@@ -496,8 +1066,13 @@ class Window(tk.Tk):
                 except tk.TclError:
                     pass
             self._image_cl_id = None
+        if self._raw_image is not None:
+            # release the file handle now, an open file blocks send2trash on Windows
+            self._raw_image.close()
         self._raw_image = None
+        self._gif_raw_frames = None
         self._image = None
+        self._current_ext = None
         logger.debug("Window._clean_mediasource: done")
     def volume_down(self, *args, **kwargs):
         if VLC_SUPPORT and self.playing_video:
@@ -505,28 +1080,25 @@ class Window(tk.Tk):
             self.volume = max(0, self.volume - 5)
             self.vlc_player.audio_set_volume(self.volume)
             logger.debug("Window.volume_down: set to %s", self.volume)
-            pc = (self.image_iter+1) / len(self.image_list) * 100
-            self.fileNameLabel.configure(text=f"V={self.volume}%\t{pc:.2f}% {self.image_iter+1}/{len(self.image_list)}\t" + self.image_list[self.image_iter] + f"\t{self.curr_timespf}")
+            self.fileNameLabel.configure(text=f"V={self.volume}%{self._label_suffix}")
     def volume_up(self, *args, **kwargs):
         if VLC_SUPPORT and self.playing_video:
             logger.debug("Window.volume_up")
             self.volume = min(100, self.volume + 5)
             self.vlc_player.audio_set_volume(self.volume)
             logger.debug("Window.volume_up: set to %s", self.volume)
-            pc = (self.image_iter+1) / len(self.image_list) * 100
-            self.fileNameLabel.configure(text=f"V={self.volume}%\t{pc:.2f}% {self.image_iter+1}/{len(self.image_list)}\t" + self.image_list[self.image_iter] + f"\t{self.curr_timespf}")
+            self.fileNameLabel.configure(text=f"V={self.volume}%{self._label_suffix}")
     def handle_seek(self):
         """search for first media without score"""
         if not self.image_list:
             return
-        if not any(tag.startswith("score__") for tag in self.tag_list):
+        if not self._has_score:
             return
-        self.image_iter = 0
-        while self.image_iter < len(self.image_list)-1 and any(tag.startswith("score__") for tag in self.tag_list):
-            self.image_iter += 1
-            self.reload_tags(flush=False)
-        self.image_iter %= len(self.image_list)
-        self.reload_tags()
+        target = next((i for i, path in enumerate(self.image_list)
+                       if path in self._unscored and i not in self._deleted_indices), None)
+        if target is None:
+            target = next(i for i in range(len(self.image_list) - 1, -1, -1) if i not in self._deleted_indices)
+        self.image_iter = target
         self.reload_image()
     def jump_10(self):
         """forward 10 seconds"""